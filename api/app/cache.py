@@ -0,0 +1,153 @@
+"""Cache em memória para respostas de rotas.
+
+TTL + LRU simples, usado pelos endpoints /route e /alternatives para não
+recalcular Dijkstra/Yen em consultas repetidas dentro da janela de validade.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+# Número de shards; precisa ser potência de 2 para o roteamento por máscara.
+_NUM_SHARDS = 16
+
+
+class _Entry(NamedTuple):
+    """Entrada do cache: tupla (layout compacto, sem dict por entrada) com
+    campos nomeados."""
+
+    value: Any
+    expires: float
+
+
+class _Shard:
+    """Um segmento independente do cache, com seu próprio lock.
+
+    Mantê-los como objetos separados (alocações distintas) evita que os
+    locks de shards vizinhos caiam na mesma linha de cache.
+    """
+
+    __slots__ = ("od", "lock", "hits", "misses")
+
+    def __init__(self) -> None:
+        # chave -> _Entry; a ordem de inserção/toque é a ordem LRU.
+        self.od: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+
+class LRUCache:
+    """Cache LRU com TTL, particionado em 16 shards com lock próprio.
+
+    Sob o threadpool do FastAPI todas as rotas cacheadas passam por aqui;
+    um único RLock global serializava os workers, então o tráfego é
+    distribuído por ``hash(key) & 15`` e cada shard sincroniza sozinho.
+
+    Cada shard é um único OrderedDict: ``get`` faz ``move_to_end`` e a
+    evicção é ``popitem(last=False)`` — ambos O(1), sem varredura linear.
+    """
+
+    def __init__(self, max_size: int = 500, ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shards = [_Shard() for _ in range(_NUM_SHARDS)]
+        # Limite por shard; o total efetivo continua ~max_size.
+        self._shard_max = max(1, max_size // _NUM_SHARDS)
+
+    def _shard(self, key: Any) -> _Shard:
+        return self.shards[hash(key) & (_NUM_SHARDS - 1)]
+
+    def get(self, key: Any) -> Optional[Any]:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.od.get(key)
+            if entry is None:
+                shard.misses += 1
+                return None
+            # Expiração pré-computada no set(): um único monotonic() + compare
+            # por lookup, imune a saltos do relógio de parede.
+            if entry.expires < time.monotonic():
+                del shard.od[key]
+                shard.misses += 1
+                return None
+            shard.od.move_to_end(key)
+            shard.hits += 1
+            return entry.value
+
+    def set(self, key: Any, value: Any) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.od:
+                shard.od.move_to_end(key)
+            elif len(shard.od) >= self._shard_max:
+                shard.od.popitem(last=False)
+            shard.od[key] = _Entry(value, time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        for shard in self.shards:
+            with shard.lock:
+                shard.od.clear()
+                shard.hits = 0
+                shard.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        size = hits = misses = 0
+        for shard in self.shards:
+            with shard.lock:
+                size += len(shard.od)
+                hits += shard.hits
+                misses += shard.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+def _freeze(obj: Any) -> Any:
+    """Converte argumentos não-hasheáveis (list/dict/set) em equivalentes imutáveis."""
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(item) for item in obj)
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, set):
+        return frozenset(_freeze(item) for item in obj)
+    return obj
+
+
+def cached_route(cache_instance: LRUCache) -> Callable:
+    """Decorator que memoiza o resultado de um handler no cache dado."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # A tupla é hasheada em C pelo próprio dict — sem JSON nem MD5.
+            key = (
+                func.__name__,
+                args,
+                tuple(sorted(kwargs.items())) if kwargs else (),
+            )
+            try:
+                hash(key)
+            except TypeError:
+                key = _freeze(key)
+            cached = cache_instance.get(key)
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            cache_instance.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+route_cache = LRUCache(max_size=500, ttl=300)
+alternatives_cache = LRUCache(max_size=200, ttl=300)
@@ -0,0 +1,73 @@
+"""Exceções de domínio da API e seu handler FastAPI.
+
+Cada subclasse carrega o status HTTP como atributo de classe
+(``HTTP_STATUS``), então o handler não depende de um mapa separado que
+teria que ser mantido em sincronia com a lista de subclasses.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ConneccityException(Exception):
+    """Base das exceções de domínio; 500 salvo sobrescrita na subclasse."""
+
+    HTTP_STATUS = 500
+
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.message = message
+        self.details = details or {}
+
+
+class GraphLoadException(ConneccityException):
+    """Falha ao carregar o grafo (CSVs ausentes/corrompidos, lib nativa)."""
+
+    HTTP_STATUS = 500
+
+
+class EngineInitializationException(ConneccityException):
+    """Motor de rotas não pôde ser inicializado."""
+
+    HTTP_STATUS = 503
+
+
+class NodeNotFoundException(ConneccityException):
+    """Nó de origem/destino inexistente no grafo."""
+
+    HTTP_STATUS = 404
+
+
+class RouteCalculationException(ConneccityException):
+    """Não foi possível calcular uma rota entre os nós pedidos."""
+
+    HTTP_STATUS = 422
+
+
+class InvalidProfileException(ConneccityException):
+    """Perfil de acessibilidade desconhecido."""
+
+    HTTP_STATUS = 400
+
+
+async def handle_conneccity_exception(
+    request: Request, exc: ConneccityException
+) -> ORJSONResponse:
+    """Converte uma exceção de domínio na resposta JSON padrão da API."""
+    status_code = getattr(exc, "HTTP_STATUS", 500)
+    logger.warning(
+        "%s em %s: %s", type(exc).__name__, request.url.path, exc.message
+    )
+    return ORJSONResponse(
+        status_code=status_code,
+        content={
+            "error": type(exc).__name__,
+            "message": exc.message,
+            "details": exc.details,
+        },
+    )
@@ -0,0 +1,309 @@
+"""Bindings ctypes para o motor de rotas em C (librouting).
+
+O grafo, Dijkstra, Yen (k caminhos) e a análise de melhorias de arestas
+vivem do lado C; aqui ficam as structs espelhadas e a classe Engine que os
+handlers usam.
+"""
+
+import ctypes as ct
+import os
+import threading
+
+import numpy as np
+
+_LIB_PATH = os.environ.get(
+    "CONNECTCITY_LIB",
+    os.path.join(os.path.dirname(__file__), "..", "native", "librouting.so"),
+)
+
+# CDLL (e não PyDLL): ctypes solta o GIL durante cada chamada nativa, então
+# dijkstra_shortest/k_shortest_yen/analyze_edge_improvements rodam em paralelo
+# entre as threads do FastAPI. Para isso valer, nenhuma assinatura abaixo pode
+# receber callback Python (CFUNCTYPE) — mantenha tudo como ponteiro/escalares.
+lib = ct.CDLL(_LIB_PATH)
+
+
+class Node(ct.Structure):
+    _fields_ = [
+        ("id", ct.c_char * 64),
+        ("lat", ct.c_double),
+        ("lon", ct.c_double),
+    ]
+
+
+class Graph(ct.Structure):
+    _fields_ = [
+        ("n", ct.c_int),
+        ("m", ct.c_int),
+        ("nodes", ct.POINTER(Node)),
+    ]
+
+
+class Params(ct.Structure):
+    _fields_ = [
+        ("w_tempo", ct.c_double),
+        ("w_transferencia", ct.c_double),
+        ("w_escada", ct.c_double),
+        ("w_calcada_ruim", ct.c_double),
+        ("w_risco_alag", ct.c_double),
+        ("chuva", ct.c_int),
+    ]
+
+
+class Route(ct.Structure):
+    _fields_ = [
+        ("path", ct.POINTER(ct.c_int)),
+        ("len", ct.c_int),
+        ("cost", ct.c_double),
+    ]
+
+
+class EdgeImprovement(ct.Structure):
+    _fields_ = [
+        ("from_node", ct.c_int),
+        ("to_node", ct.c_int),
+        ("issue_type", ct.c_char * 32),
+        ("current_cost", ct.c_double),
+        ("potential_savings", ct.c_double),
+        ("affected_routes", ct.c_int),
+        ("impact_score", ct.c_double),
+        ("priority", ct.c_int),
+    ]
+
+
+class EdgeAnalysisResult(ct.Structure):
+    _fields_ = [
+        ("improvements", ct.POINTER(EdgeImprovement)),
+        ("count", ct.c_int),
+    ]
+
+
+lib.load_graph_from_csv.argtypes = [ct.c_char_p, ct.c_char_p]
+lib.load_graph_from_csv.restype = ct.POINTER(Graph)
+
+lib.free_graph.argtypes = [ct.POINTER(Graph)]
+lib.free_graph.restype = None
+
+lib.node_index_by_id.argtypes = [ct.POINTER(Graph), ct.c_char_p]
+lib.node_index_by_id.restype = ct.c_int
+
+lib.dijkstra_shortest.argtypes = [
+    ct.POINTER(Graph),
+    ct.c_int,
+    ct.c_int,
+    ct.POINTER(Params),
+]
+lib.dijkstra_shortest.restype = Route
+
+lib.k_shortest_yen.argtypes = [
+    ct.POINTER(Graph),
+    ct.c_int,
+    ct.c_int,
+    ct.POINTER(Params),
+    ct.c_int,
+    ct.POINTER(Route),
+]
+lib.k_shortest_yen.restype = ct.c_int
+
+lib.free_route.argtypes = [ct.POINTER(Route)]
+lib.free_route.restype = None
+
+lib.analyze_edge_improvements.argtypes = [
+    ct.POINTER(Graph),
+    ct.POINTER(Params),
+    ct.c_int,
+]
+lib.analyze_edge_improvements.restype = ct.POINTER(EdgeAnalysisResult)
+
+lib.free_edge_analysis.argtypes = [ct.POINTER(EdgeAnalysisResult)]
+lib.free_edge_analysis.restype = None
+
+# Espelho numpy de EdgeImprovement; align=True reproduz o padding do C, e o
+# assert trava o layout caso a struct mude de um lado só.
+EDGE_DTYPE = np.dtype(
+    {
+        "names": [
+            "from_node",
+            "to_node",
+            "issue_type",
+            "current_cost",
+            "potential_savings",
+            "affected_routes",
+            "impact_score",
+            "priority",
+        ],
+        "formats": ["<i4", "<i4", "S32", "<f8", "<f8", "<i4", "<f8", "<i4"],
+    },
+    align=True,
+)
+assert EDGE_DTYPE.itemsize == ct.sizeof(EdgeImprovement)
+
+
+# Pesos por perfil de acessibilidade; "chuva" escala o risco de alagamento
+# do lado C.
+DEFAULT_WEIGHTS = {
+    "padrao": {
+        "tempo": 1.0,
+        "transferencia": 2.0,
+        "escada": 1.0,
+        "calcada_ruim": 1.0,
+        "risco_alag": 2.0,
+    },
+    "cadeirante": {
+        "tempo": 1.0,
+        "transferencia": 5.0,
+        "escada": 1000.0,
+        "calcada_ruim": 50.0,
+        "risco_alag": 30.0,
+    },
+    "mobilidade_reduzida": {
+        "tempo": 1.0,
+        "transferencia": 4.0,
+        "escada": 20.0,
+        "calcada_ruim": 10.0,
+        "risco_alag": 15.0,
+    },
+}
+
+
+# Pool por thread do array de Route passado ao Yen: construir (Route * k)()
+# a cada chamada paga a criação de k Structures + GC. Thread-local porque o
+# buffer é preenchido in-place pelo C e não pode ser compartilhado.
+_ROUTE_POOL = threading.local()
+_ROUTE_POOL_MIN = 16
+
+
+def _route_buffer(k: int):
+    buf = getattr(_ROUTE_POOL, "buf", None)
+    if buf is None or len(buf) < k:
+        buf = (Route * max(k, _ROUTE_POOL_MIN))()
+        _ROUTE_POOL.buf = buf
+    else:
+        # Reuso: zera os campos que o C lê/escreve para não vazar a chamada
+        # anterior caso o Yen retorne menos rotas.
+        for i in range(k):
+            buf[i].len = 0
+            buf[i].path = None
+    return buf
+
+
+def _route_path(r: Route) -> list:
+    """Copia Route.path inteiro para uma lista Python.
+
+    np.ctypeslib.as_array é uma view sem cópia sobre o buffer C; tolist()
+    materializa tudo num único memcpy + build, em vez de cruzar a fronteira
+    Python/C uma vez por índice. Precisa rodar antes de free_route.
+    """
+    if r.len <= 0 or not r.path:
+        return []
+    return np.ctypeslib.as_array(r.path, shape=(r.len,)).tolist()
+
+
+class Engine:
+    """Fachada Python sobre o grafo e os algoritmos nativos."""
+
+    def __init__(self, nodes_csv: str, edges_csv: str):
+        self.g = lib.load_graph_from_csv(nodes_csv.encode(), edges_csv.encode())
+        if not self.g:
+            raise RuntimeError(
+                f"Falha ao carregar grafo de {nodes_csv} / {edges_csv}"
+            )
+        # Mapas id<->índice materializados uma vez: idx()/node_id() são
+        # chamados por nó de caminho em cada request, e cada chamada custava
+        # uma travessia FFI + um decode UTF-8.
+        n = self.g.contents.n
+        nodes = self.g.contents.nodes
+        self._idx_to_id = [nodes[i].id.decode() for i in range(n)]
+        self._id_to_idx = {node_id: i for i, node_id in enumerate(self._idx_to_id)}
+
+    def idx(self, node_id: str) -> int:
+        """Índice interno de um nó; -1 se não existir."""
+        return self._id_to_idx.get(node_id, -1)
+
+    def node_id(self, i: int) -> str:
+        """Id textual do nó de índice ``i``; "" se fora do intervalo."""
+        if 0 <= i < len(self._idx_to_id):
+            return self._idx_to_id[i]
+        return ""
+
+    def _params(self, perfil: str, chuva: bool) -> Params:
+        weights = DEFAULT_WEIGHTS.get(perfil, DEFAULT_WEIGHTS["padrao"])
+        return Params(
+            w_tempo=weights["tempo"],
+            w_transferencia=weights["transferencia"],
+            w_escada=weights["escada"],
+            w_calcada_ruim=weights["calcada_ruim"],
+            w_risco_alag=weights["risco_alag"],
+            chuva=1 if chuva else 0,
+        )
+
+    def best(self, s: int, t: int, params: Params):
+        """Melhor rota s→t; retorna (path, cost) ou ([], inf) se não há rota."""
+        r = lib.dijkstra_shortest(self.g, s, t, ct.byref(params))
+        try:
+            path = _route_path(r)
+        finally:
+            lib.free_route(ct.byref(r))
+        return path, r.cost
+
+    def k_alternatives(self, s: int, t: int, params: Params, k: int):
+        """Até k rotas alternativas (Yen); lista de (path, cost)."""
+        routes = _route_buffer(k)
+        n = lib.k_shortest_yen(self.g, s, t, ct.byref(params), k, routes)
+        results = []
+        for i in range(n):
+            try:
+                results.append((_route_path(routes[i]), routes[i].cost))
+            finally:
+                lib.free_route(ct.byref(routes[i]))
+        return results
+
+    def analyze_edge_improvements(self, params: Params, max_results: int = 20):
+        """Arestas cuja melhoria mais reduziria custos de rota."""
+        result_ptr = lib.analyze_edge_improvements(self.g, ct.byref(params), max_results)
+        if not result_ptr:
+            return []
+        result = result_ptr.contents
+        count = result.count
+        if count <= 0 or not result.improvements:
+            lib.free_edge_analysis(result_ptr)
+            return []
+        # Uma view estruturada sobre o array C + .copy() traz tudo num
+        # memcpy; a extração por coluna roda em C, sem getattr por elemento.
+        buf = (ct.c_byte * (count * ct.sizeof(EdgeImprovement))).from_address(
+            ct.addressof(result.improvements.contents)
+        )
+        arr = np.frombuffer(buf, dtype=EDGE_DTYPE).copy()
+        lib.free_edge_analysis(result_ptr)
+        issue_types = np.char.decode(arr["issue_type"], "utf-8")
+        return [
+            {
+                "from": from_node,
+                "to": to_node,
+                "issue_type": issue_type,
+                "current_cost": current_cost,
+                "potential_savings": potential_savings,
+                "affected_routes": affected_routes,
+                "impact_score": impact_score,
+                "priority": priority,
+            }
+            for (
+                from_node,
+                to_node,
+                issue_type,
+                current_cost,
+                potential_savings,
+                affected_routes,
+                impact_score,
+                priority,
+            ) in zip(
+                arr["from_node"].tolist(),
+                arr["to_node"].tolist(),
+                issue_types.tolist(),
+                arr["current_cost"].tolist(),
+                arr["potential_savings"].tolist(),
+                arr["affected_routes"].tolist(),
+                arr["impact_score"].tolist(),
+                arr["priority"].tolist(),
+            )
+        ]
@@ -0,0 +1,349 @@
+"""Endpoints de análise estrutural do grafo de mobilidade.
+
+Expõe métricas de conectividade, componentes e uma visão serializável do
+grafo para o frontend, a partir dos CSVs de nós e arestas.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from fastapi import APIRouter, HTTPException
+
+try:
+    from numba import njit
+
+    _HAS_NUMBA = True
+except ImportError:  # numba é opcional; sem ele os kernels rodam em Python puro
+    _HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["graph"])
+
+DATA_DIR = os.environ.get(
+    "CONNECTCITY_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data"),
+)
+NODES_FILE = os.path.join(DATA_DIR, "nodes.csv")
+EDGES_FILE = os.path.join(DATA_DIR, "edges.csv")
+
+# Memo do grafo carregado, chaveado por (path, mtime_ns, size) dos dois CSVs.
+# Os dados são estáticos entre deploys; reler e reconstruir o nx.Graph a cada
+# request era o custo dominante de todos os endpoints abaixo. A invalidação é
+# automática: qualquer mudança nos arquivos muda a chave.
+_GRAPH_CACHE: Dict[tuple, Tuple[pd.DataFrame, pd.DataFrame, nx.Graph]] = {}
+
+# Memo das respostas prontas dos endpoints de análise; a chave inclui o mtime
+# dos CSVs, então muda junto com o grafo. Depois do primeiro hit cada request
+# vira um lookup de dict. Dict simples, como _GRAPH_CACHE: o domínio é um
+# punhado de endpoints conhecidos (nada para um LRU limitar) e a poda por
+# geração em _cached_analysis descarta as chaves de CSVs antigos.
+analysis_cache: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _csv_cache_key(nodes_file: str, edges_file: str) -> tuple:
+    nodes_stat = os.stat(nodes_file)
+    edges_stat = os.stat(edges_file)
+    return (
+        nodes_file,
+        nodes_stat.st_mtime_ns,
+        nodes_stat.st_size,
+        edges_file,
+        edges_stat.st_mtime_ns,
+        edges_stat.st_size,
+    )
+
+
+def load_graph_data(
+    nodes_file: str = NODES_FILE, edges_file: str = EDGES_FILE
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Carrega os CSVs de nós e arestas como DataFrames."""
+    nodes = pd.read_csv(nodes_file)
+    edges = pd.read_csv(edges_file)
+    return nodes, edges
+
+
+def create_networkx_graph(nodes: pd.DataFrame, edges: pd.DataFrame) -> nx.Graph:
+    """Constrói o grafo NetworkX a partir dos DataFrames.
+
+    Usa inserção em lote (from_pandas_edgelist / add_nodes_from) em vez de
+    iterrows, que materializa uma Series por linha.
+    """
+    G = nx.from_pandas_edgelist(
+        edges,
+        source="from",
+        target="to",
+        edge_attr=[
+            "tempo_min",
+            "transferencia",
+            "escada",
+            "calcada_ruim",
+            "risco_alag",
+            "modo",
+        ],
+    )
+    G.add_nodes_from(
+        zip(nodes["id"], nodes[["name", "lat", "lon", "tipo"]].to_dict("records"))
+    )
+    return G
+
+
+def get_graph(
+    nodes_file: str = NODES_FILE, edges_file: str = EDGES_FILE
+) -> Tuple[pd.DataFrame, pd.DataFrame, nx.Graph]:
+    """Retorna (nodes, edges, G), reusando o memo enquanto os CSVs não mudam."""
+    try:
+        key = _csv_cache_key(nodes_file, edges_file)
+    except OSError as exc:
+        raise HTTPException(status_code=500, detail=f"Dados do grafo indisponíveis: {exc}")
+    cached = _GRAPH_CACHE.get(key)
+    if cached is not None:
+        return cached
+    nodes, edges = load_graph_data(nodes_file, edges_file)
+    G = create_networkx_graph(nodes, edges)
+    # Entradas antigas (mtime anterior) não servem mais; mantém só a atual.
+    _GRAPH_CACHE.clear()
+    _GRAPH_CACHE[key] = (nodes, edges, G)
+    logger.info(
+        "Grafo carregado: %d nós, %d arestas", G.number_of_nodes(), G.number_of_edges()
+    )
+    return nodes, edges, G
+
+
+@njit(cache=True)
+def _count_barriers(escada, calcada, risco, trans):
+    """Conta as quatro barreiras numa passada sobre colunas int32.
+
+    cache=True grava o código compilado em disco, então o custo do JIT é
+    pago uma vez por máquina, não por processo.
+    """
+    e = c = r = t = 0
+    for i in range(escada.shape[0]):
+        if escada[i]:
+            e += 1
+        if calcada[i]:
+            c += 1
+        if risco[i]:
+            r += 1
+        if trans[i]:
+            t += 1
+    return e, c, r, t
+
+
+@njit(cache=True)
+def _mode_histogram(codes, n_modes):
+    """Histograma de um array já fatorizado (códigos inteiros densos)."""
+    counts = np.zeros(n_modes, dtype=np.int64)
+    for i in range(codes.shape[0]):
+        counts[codes[i]] += 1
+    return counts
+
+
+def _cached_analysis(name: str, compute: Any) -> Dict[str, Any]:
+    """Memoiza o payload final de um endpoint, chaveado pelo mtime dos CSVs."""
+    try:
+        key = (name, _csv_cache_key(NODES_FILE, EDGES_FILE))
+    except OSError:
+        # Sem os arquivos a computação falha sozinha com o erro apropriado.
+        return compute()
+    hit = analysis_cache.get(key)
+    if hit is not None:
+        return hit
+    result = compute()
+    # Respostas de versões anteriores dos CSVs não servem mais; só a
+    # geração atual fica.
+    for stale in [k for k in analysis_cache if k[1] != key[1]]:
+        del analysis_cache[stale]
+    analysis_cache[key] = result
+    return result
+
+
+@router.get("/graph/connectivity")
+def get_graph_connectivity() -> Dict[str, Any]:
+    """Métricas de conectividade do grafo completo."""
+    return _cached_analysis("connectivity", _compute_connectivity)
+
+
+def _sparse_components(nodes: pd.DataFrame, edges: pd.DataFrame):
+    """Rótulos de componente conexo via CSR + csgraph, tudo em código compilado.
+
+    Retorna (n_components, labels, rows, cols), com rows/cols já mapeados
+    para índices de nó.
+    """
+    n = len(nodes)
+    idx = {node_id: i for i, node_id in enumerate(nodes["id"])}
+    rows = edges["from"].map(idx).to_numpy()
+    cols = edges["to"].map(idx).to_numpy()
+    data = np.ones(len(rows), dtype=np.int8)
+    adjacency = csr_matrix((data, (rows, cols)), shape=(n, n))
+    n_components, labels = connected_components(adjacency, directed=False)
+    return n_components, labels, rows, cols
+
+
+def _compute_connectivity() -> Dict[str, Any]:
+    nodes, edges, G = get_graph()
+    n = len(nodes)
+    m = len(edges)
+    n_components, _, _, _ = _sparse_components(nodes, edges)
+    return {
+        "total_nodes": n,
+        "total_edges": m,
+        "is_connected": n_components == 1,
+        "number_of_components": n_components,
+        "density": 2.0 * m / (n * (n - 1)) if n > 1 else 0.0,
+        "average_degree": 2.0 * m / n if n else 0.0,
+    }
+
+
+@router.get("/graph/structure")
+def get_graph_structure() -> Dict[str, Any]:
+    """Resumo estrutural: tipos de nó, modos de transporte e barreiras."""
+    return _cached_analysis("structure", _compute_structure)
+
+
+def _compute_structure() -> Dict[str, Any]:
+    nodes, edges, G = get_graph()
+
+    # Agrupamento direto no DataFrame: as colunas já estão carregadas, não há
+    # por que re-iterar G.nodes em Python.
+    nodes_by_type = {
+        tipo: group[["id", "name", "lat", "lon"]].to_dict("records")
+        for tipo, group in nodes.groupby("tipo")
+    }
+
+    # Os contadores saem das colunas inteiras do DataFrame via kernels
+    # JIT-áveis; só a montagem de strings/dicts fica em Python.
+    escada, calcada_ruim, risco_alag, transferencia = _count_barriers(
+        edges["escada"].to_numpy(np.int32),
+        edges["calcada_ruim"].to_numpy(np.int32),
+        edges["risco_alag"].to_numpy(np.int32),
+        edges["transferencia"].to_numpy(np.int32),
+    )
+    codes, uniques = pd.factorize(edges["modo"].fillna("unknown"))
+    counts = _mode_histogram(codes.astype(np.int32), len(uniques))
+    edge_modes = {str(modo): int(n) for modo, n in zip(uniques, counts)}
+
+    return {
+        "nodes_by_type": nodes_by_type,
+        "node_type_counts": {t: len(v) for t, v in nodes_by_type.items()},
+        "edge_modes": edge_modes,
+        "barriers": {
+            "escada": escada,
+            "calcada_ruim": calcada_ruim,
+            "risco_alag": risco_alag,
+            "transferencia": transferencia,
+        },
+    }
+
+
+@router.get("/graph/components")
+def get_graph_components() -> Dict[str, Any]:
+    """Componentes conexos e suas métricas."""
+    return _cached_analysis("components", _compute_components)
+
+
+# Acima deste tamanho o diâmetro exato (BFS a partir de cada nó, O(V·(V+E)))
+# fica caro demais; usamos a aproximação por varredura dupla.
+_EXACT_DIAMETER_MAX_NODES = 500
+
+
+def _approx_diameter(H: nx.Graph) -> int:
+    """Limite inferior do diâmetro via 2-sweep BFS — O(V+E) em vez de O(V·(V+E)).
+
+    Parte de um nó qualquer, acha o mais distante v, e devolve a maior
+    distância a partir de v. Exato em árvores; na prática muito próximo do
+    diâmetro real em grafos viários.
+    """
+    u = next(iter(H))
+    v, _ = max(nx.single_source_shortest_path_length(H, u).items(), key=lambda x: x[1])
+    _, d = max(nx.single_source_shortest_path_length(H, v).items(), key=lambda x: x[1])
+    return d
+
+
+def _compute_components() -> Dict[str, Any]:
+    nodes, edges, G = get_graph()
+    n_components, labels, rows, cols = _sparse_components(nodes, edges)
+    # Tamanhos e arestas por componente em duas chamadas bincount; cada
+    # aresta pertence ao componente dos seus dois extremos.
+    sizes = np.bincount(labels, minlength=n_components)
+    edges_per_component = np.bincount(labels[rows], minlength=n_components)
+    ids = nodes["id"].to_numpy()
+
+    components = []
+    for i in range(n_components):
+        size = int(sizes[i])
+        edge_count = int(edges_per_component[i])
+        members = ids[labels == i]
+        if size <= 1:
+            diameter, exact = 0, True
+        else:
+            # Só o diâmetro ainda precisa de BFS; o subgrafo NetworkX é
+            # construído apenas para esse cálculo.
+            subgraph = G.subgraph(members)
+            if size < _EXACT_DIAMETER_MAX_NODES:
+                diameter, exact = nx.diameter(subgraph), True
+            else:
+                diameter, exact = _approx_diameter(subgraph), False
+        components.append(
+            {
+                "id": i,
+                "size": size,
+                "edges": edge_count,
+                "density": 2.0 * edge_count / (size * (size - 1)) if size > 1 else 0.0,
+                "diameter": diameter,
+                "diameter_exact": exact,
+                "sample_nodes": sorted(members.tolist())[:10],
+            }
+        )
+    components.sort(key=lambda c: c["size"], reverse=True)
+    return {"number_of_components": n_components, "components": components}
+
+
+@router.get("/graph/visualization")
+def get_graph_visualization() -> ORJSONResponse:
+    """Payload completo de nós e arestas para renderização no frontend.
+
+    É o maior payload da API; devolver ORJSONResponse direto serializa em C
+    (orjson lida com escalares numpy) e pula o encoder do FastAPI.
+    """
+    return ORJSONResponse(_cached_analysis("visualization", _compute_visualization))
+
+
+def _compute_visualization() -> Dict[str, Any]:
+    nodes, edges, G = get_graph()
+
+    # O grau é a única informação que vem do grafo; o resto sai direto dos
+    # DataFrames via to_dict('records'), que roda em C.
+    deg = dict(G.degree())
+    nodes_data = (
+        nodes[["id", "name", "lat", "lon", "tipo"]]
+        .assign(degree=nodes["id"].map(deg).fillna(0).astype(int))
+        .to_dict("records")
+    )
+    edges_data = edges[
+        [
+            "from",
+            "to",
+            "tempo_min",
+            "modo",
+            "transferencia",
+            "escada",
+            "calcada_ruim",
+            "risco_alag",
+        ]
+    ].to_dict("records")
+
+    return {"nodes": nodes_data, "edges": edges_data}
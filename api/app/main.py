@@ -0,0 +1,1291 @@
+"""API principal do Conneccity.
+
+Rotas acessíveis ponto-a-ponto sobre o motor nativo (Dijkstra/Yen), mais
+consulta de nós/arestas, relatórios de barreiras e notificações.
+"""
+
+import asyncio
+import csv
+import functools
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+# uvloop substitui o event loop padrão pelo libuv — ganho típico de 20-40%
+# de throughput em serviços FastAPI sem nenhuma outra mudança. Opcional
+# (Linux/macOS); sem ele o loop padrão do asyncio segue valendo.
+try:
+    import uvloop
+
+    uvloop.install()
+except ImportError:
+    pass
+
+try:
+    import pyarrow.csv as pacsv
+
+    _HAS_PYARROW = True
+except ImportError:  # pyarrow é opcional; sem ele o parse cai no csv stdlib
+    _HAS_PYARROW = False
+
+from . import route_utils
+from .cache import alternatives_cache, route_cache
+from .exceptions import (
+    ConneccityException,
+    EngineInitializationException,
+    InvalidProfileException,
+    NodeNotFoundException,
+    RouteCalculationException,
+    handle_conneccity_exception,
+)
+from .ffi import DEFAULT_WEIGHTS, Engine
+from .graph_analysis_api import router as graph_router
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("conneccity")
+
+# Conjunto imutável para o teste de pertinência do caminho quente; evita
+# hashear contra o dict de pesos a cada request.
+PROFILES = frozenset(DEFAULT_WEIGHTS)
+
+DATA_DIR = os.environ.get(
+    "CONNECTCITY_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data"),
+)
+
+# Fontes de dados em ordem de prioridade.
+HYBRID_NODES = os.path.join(DATA_DIR, "hybrid_nodes.csv")
+HYBRID_EDGES = os.path.join(DATA_DIR, "hybrid_edges.csv")
+SP_INTEGRATED_NODES = os.path.join(DATA_DIR, "sp_integrated_nodes.csv")
+SP_INTEGRATED_EDGES = os.path.join(DATA_DIR, "sp_integrated_edges.csv")
+NODES = os.path.join(DATA_DIR, "nodes.csv")
+EDGES = os.path.join(DATA_DIR, "edges.csv")
+MINIMAL_NODES = os.path.join(DATA_DIR, "minimal_nodes.csv")
+MINIMAL_EDGES = os.path.join(DATA_DIR, "minimal_edges.csv")
+# Arquivo legado de relatos (pré-particionamento); migrado para arquivos
+# por dia no primeiro import e mantido só como fonte da migração.
+BARRIERS_FILE = os.path.join(DATA_DIR, "barriers_reports.jsonl")
+
+# Índice incremental dos JSONL de barreiras: /notifications só lê os bytes
+# anexados desde a última chamada em vez de re-parsear os arquivos; entradas
+# fora da janela de 7 dias saem pela esquerda do deque. Os relatos são
+# particionados por dia (barriers_reports.YYYYMMDD.jsonl), então o custo de
+# qualquer varredura é limitado pela janela e não pela idade do dataset.
+_barriers_lock = threading.Lock()
+_barriers_cache: Dict[str, Any] = {"files": {}, "entries": deque()}
+
+
+def _barrier_path_for(ts: float) -> str:
+    """Arquivo do dia (UTC) a que um timestamp pertence."""
+    return os.path.join(
+        DATA_DIR, "barriers_reports.%s.jsonl" % time.strftime("%Y%m%d", time.gmtime(ts))
+    )
+
+
+def _barrier_week_paths(now_ts: float) -> List[str]:
+    """Arquivos que cobrem a janela de 7 dias, em ordem cronológica."""
+    return [_barrier_path_for(now_ts - days * 86400) for days in range(7, -1, -1)]
+
+
+def _migrate_legacy_barriers() -> None:
+    """Reparte o JSONL único legado em arquivos por dia (roda uma vez)."""
+    if not os.path.isfile(BARRIERS_FILE):
+        return
+    buckets: Dict[str, List[bytes]] = {}
+    with open(BARRIERS_FILE, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            buckets.setdefault(
+                _barrier_path_for(entry.get("received_at", 0)), []
+            ).append(line)
+    for path, lines in buckets.items():
+        with open(path, "ab") as f:
+            f.writelines(lines)
+    os.replace(BARRIERS_FILE, BARRIERS_FILE + ".migrated")
+    logger.info("Relatos de barreira migrados para %d arquivo(s) diário(s)", len(buckets))
+
+
+try:
+    _migrate_legacy_barriers()
+except OSError as exc:
+    logger.warning("Migração dos relatos de barreira falhou: %s", exc)
+
+
+def _create_minimal_dataset() -> None:
+    """Escreve um dataset mínimo para a API subir mesmo sem dados reais."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(MINIMAL_NODES, "w", newline="") as f:
+        f.write("id,name,lat,lon,tipo\n")
+        f.write("A,Estação A,-23.55,-46.63,metro\n")
+        f.write("B,Estação B,-23.56,-46.64,metro\n")
+        f.write("C,Parada C,-23.57,-46.65,onibus\n")
+    with open(MINIMAL_EDGES, "w", newline="") as f:
+        f.write("from,to,tempo_min,transferencia,escada,calcada_ruim,risco_alag,modo\n")
+        f.write("A,B,5,0,0,0,0,metro\n")
+        f.write("B,C,8,1,0,1,0,onibus\n")
+
+
+def _probe_paths(paths: List[str]) -> Dict[str, tuple]:
+    """(existe, tamanho) para cada caminho, com um scandir por diretório.
+
+    A torre de fallback fazia isfile + getsize por arquivo — dois syscalls
+    cada, repetidos no bloco dos DataFrames. Um os.scandir por diretório
+    responde todos de uma vez; o teste vira lookup de dict.
+    """
+    probe = {path: (False, 0) for path in paths}
+    by_dir: Dict[str, List[str]] = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path) or ".", []).append(path)
+    for parent, members in by_dir.items():
+        names = {os.path.basename(p): p for p in members}
+        try:
+            with os.scandir(parent) as it:
+                for entry in it:
+                    target = names.get(entry.name)
+                    if target is not None and entry.is_file():
+                        # stat() segue symlinks, como o is_file() acima: o
+                        # que interessa é o tamanho do conteúdo, não do link.
+                        probe[target] = (True, entry.stat().st_size)
+        except OSError:
+            continue
+    return probe
+
+
+# Camadas de dados em ordem de prioridade: (nós, arestas, tamanho mínimo,
+# rótulo). Uma lista em vez da torre de ifs aninhados — adicionar uma camada
+# é acrescentar uma tupla.
+DATA_CANDIDATES = [
+    (HYBRID_NODES, HYBRID_EDGES, 100, "híbrido"),
+    (SP_INTEGRATED_NODES, SP_INTEGRATED_EDGES, 100, "SP integrado"),
+    (NODES, EDGES, 0, "primário"),
+    (MINIMAL_NODES, MINIMAL_EDGES, 0, "mínimo"),
+]
+
+
+def _candidate_ok(probe: Dict[str, tuple], nodes_path: str, edges_path: str, min_size: int) -> bool:
+    return (
+        probe[nodes_path][0]
+        and probe[edges_path][0]
+        and probe[nodes_path][1] > min_size
+        and probe[edges_path][1] > min_size
+    )
+
+
+def _init_engine_with_fallback() -> Engine:
+    """Inicializa o Engine na primeira fonte de dados válida."""
+    probe = _probe_paths([p for n, e, _, _ in DATA_CANDIDATES for p in (n, e)])
+    for nodes_path, edges_path, min_size, label in DATA_CANDIDATES[:-1]:
+        if not _candidate_ok(probe, nodes_path, edges_path, min_size):
+            continue
+        try:
+            logger.info("Inicializando engine com dataset %s", label)
+            return Engine(nodes_path, edges_path)
+        except Exception as exc:
+            logger.warning("Dataset %s falhou: %s", label, exc)
+    logger.warning("Nenhuma fonte de dados válida; criando dataset mínimo")
+    _create_minimal_dataset()
+    return Engine(MINIMAL_NODES, MINIMAL_EDGES)
+
+
+# Inicializado no lifespan (_lifespan): no import, os probes
+# de filesystem + a possível escrita do dataset mínimo bloqueavam o processo
+# antes do uvicorn aceitar conexões — e cada worker pagava isso em série.
+engine: Optional[Engine] = None
+engine_ready = asyncio.Event()
+
+# Fonte efetivamente usada pelo engine; os endpoints de dataset e o cache de
+# ids abaixo leem dos mesmos arquivos.
+GRAPH_SOURCE_NODES = NODES
+GRAPH_SOURCE_EDGES = EDGES
+
+# DataFrames para busca/fallback por nome; carregados no lifespan, em
+# paralelo com o engine, pela mesma torre de prioridade.
+nodes_df: Optional[pd.DataFrame] = None
+edges_df: Optional[pd.DataFrame] = None
+
+
+# Versão do grafo carregado; bump a cada (re)bind dos DataFrames. Chaveia
+# caches derivados (corpo de /nodes etc.) sem comparar conteúdo.
+_graph_version = 0
+
+
+def _bump_graph_version() -> None:
+    global _graph_version
+    _graph_version += 1
+
+
+# Índice name_lower -> id para o fallback por nome: a consulta vira um
+# probe de hash em vez de reconstruir uma Series minúscula e varrer o
+# DataFrame inteiro a cada request.
+NAME_TO_ID: Dict[str, str] = {}
+
+
+def _build_name_index(df: Optional[pd.DataFrame]) -> Dict[str, str]:
+    """Constrói o índice de nomes; vazio se o DataFrame não tem a coluna."""
+    if df is None or "name" not in df.columns or "id" not in df.columns:
+        return {}
+    return {
+        str(name).strip().lower(): str(node_id)
+        for node_id, name in zip(df["id"].tolist(), df["name"].tolist())
+        if name is not None
+    }
+
+
+def _load_dataframes() -> tuple:
+    """Carrega os DataFrames auxiliares; retorna (nodes, edges, src_n, src_e)."""
+    probe = _probe_paths([p for n, e, _, _ in DATA_CANDIDATES for p in (n, e)])
+    for nodes_path, edges_path, min_size, label in DATA_CANDIDATES:
+        if not _candidate_ok(probe, nodes_path, edges_path, min_size):
+            continue
+        try:
+            nodes, edges = route_utils.load_graph_data(nodes_path, edges_path)
+            return nodes, edges, nodes_path, edges_path
+        except Exception as exc:
+            logger.warning("Dataset %s falhou ao carregar: %s", label, exc)
+    return None, None, GRAPH_SOURCE_NODES, GRAPH_SOURCE_EDGES
+
+
+# Serializa a carga tardia dos DataFrames: sem o lock, N requests achando
+# nodes_df is None disparariam N parses completos de CSV em paralelo.
+_LOAD_LOCK = threading.Lock()
+
+
+def _ensure_dataframes() -> None:
+    """Carrega os DataFrames sob demanda, uma única thread por vez.
+
+    Reusa a mesma torre de candidatos do bootstrap (_load_dataframes), em
+    vez da cadeia de isfile duplicada que os handlers carregavam. Quem
+    chegar segundo encontra os globais já populados e retorna direto.
+    """
+    global nodes_df, edges_df, GRAPH_SOURCE_NODES, GRAPH_SOURCE_EDGES, NAME_TO_ID
+    with _LOAD_LOCK:
+        if nodes_df is not None and edges_df is not None:
+            return
+        nodes, edges, src_n, src_e = _load_dataframes()
+        if nodes is None or edges is None:
+            return
+        nodes_df, edges_df = nodes, edges
+        GRAPH_SOURCE_NODES, GRAPH_SOURCE_EDGES = src_n, src_e
+        NAME_TO_ID = _build_name_index(nodes_df)
+        _bump_graph_version()
+        # Já estamos numa thread do pool: aquece o índice de arestas para a
+        # recarga tardia também não empurrar o custo O(E) a um handler.
+        route_utils._edge_lookup(edges_df)
+
+
+def _load_node_ids(path: str) -> tuple:
+    """Lê a coluna id do CSV de nós uma única vez, na ordem dos índices.
+
+    Com pyarrow o parse roda em C (SIMD no scan de delimitadores) e a
+    coluna sai de storage colunar contíguo; o csv stdlib fica como
+    fallback linha a linha.
+    """
+    if _HAS_PYARROW:
+        table = pacsv.read_csv(path)
+        return tuple(table.column("id").cast("string").to_pylist())
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # cabeçalho
+        return tuple(row[0] for row in reader)
+
+
+# Cache em módulo dos ids na ordem de índice do engine. Antes cada /route,
+# /alternatives e /metrics/edge-to-fix reabria o CSV de nós e reconstruía a
+# lista via DictReader — O(N) de I/O + um dict por linha, por request.
+# Populado no lifespan (reload_node_ids), depois que a fonte é conhecida.
+# O array object reaproveita as mesmas strings já internadas: materializar
+# um caminho é um único fancy-index, sem encode/decode por hop.
+NODES_IDS: tuple = ()
+_NODE_ID_ARRAY = np.asarray(NODES_IDS, dtype=object)
+
+
+def reload_node_ids() -> None:
+    """Recarrega o cache de ids; use junto com clear_all_caches()."""
+    global NODES_IDS, _NODE_ID_ARRAY
+    if engine is not None:
+        # Fonte autoritativa: a tabela que o próprio engine montou do grafo
+        # C — ordem de índice garantida por construção, sem re-parse do CSV.
+        NODES_IDS = tuple(engine._idx_to_id)
+    else:
+        NODES_IDS = _load_node_ids(GRAPH_SOURCE_NODES)
+    _NODE_ID_ARRAY = np.asarray(NODES_IDS, dtype=object)
+
+
+def clear_all_caches() -> None:
+    route_cache.clear()
+    alternatives_cache.clear()
+    _idx.cache_clear()
+    reload_node_ids()
+
+
+ENV = os.environ.get("ENV", "dev")
+
+# Em produção não servimos docs nem schema: a geração do OpenAPI é
+# O(rotas × modelos) e só interessa em desenvolvimento.
+_docs_kwargs = (
+    {"docs_url": None, "redoc_url": None, "openapi_url": None}
+    if ENV == "prod"
+    else {}
+)
+
+# Tamanho do threadpool que executa as chamadas FFI; o default do anyio (40)
+# é alto demais para trabalho CPU-bound — limita explicitamente.
+THREADPOOL_TOKENS = int(os.environ.get("CONNECTCITY_THREADPOOL", "16"))
+
+# Sonda de conectividade no caminho de falha de /alternatives: são até 20
+# Dijkstras completos só para enriquecer um log. Desligada por padrão;
+# ligar com DEBUG_CONNECTIVITY=1 ao investigar grafos parciais.
+DEBUG_CONNECTIVITY = os.environ.get("DEBUG_CONNECTIVITY", "0") == "1"
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Bootstrap fora do import: engine e DataFrames carregam em paralelo.
+
+    O import do módulo fica barato (bom para testes e fork de workers); o
+    custo de subida vira max(engine, DataFrames) em vez da soma, e /health
+    responde enquanto isso. Handlers dependentes do engine respondem 503
+    via engine_ready até o fim.
+    """
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+    # Aquece o schema para o primeiro /openapi.json não pagar a geração.
+    if app.openapi_url:
+        app.openapi_schema = app.openapi()
+
+    global engine, nodes_df, edges_df, GRAPH_SOURCE_NODES, GRAPH_SOURCE_EDGES
+    global NAME_TO_ID
+    loaded_engine, frames = await asyncio.gather(
+        run_in_threadpool(_init_engine_with_fallback),
+        run_in_threadpool(_load_dataframes),
+    )
+    engine = loaded_engine
+    nodes_df, edges_df, GRAPH_SOURCE_NODES, GRAPH_SOURCE_EDGES = frames
+    if nodes_df is None or edges_df is None:
+        # A carga dos DataFrames corre em paralelo com o engine e pode ter
+        # sondado antes de _init_engine_with_fallback criar o dataset
+        # mínimo; re-sonda agora que o engine subiu.
+        await run_in_threadpool(_ensure_dataframes)
+    NAME_TO_ID = _build_name_index(nodes_df)
+    _bump_graph_version()
+    try:
+        reload_node_ids()
+    except OSError as exc:
+        logger.warning("Não foi possível cachear ids de nós: %s", exc)
+    # O domínio de _cached_params é minúsculo (perfis × chuva); enumerá-lo
+    # aqui garante que nenhum request paga a montagem do struct C.
+    for perfil in PROFILES:
+        for chuva in (False, True):
+            _cached_params(perfil, chuva)
+    # Renderiza o corpo de /nodes e o índice de busca já na subida: o
+    # primeiro request não paga serialização nem argsort/joins O(N) no
+    # event loop.
+    if nodes_df is not None:
+        await run_in_threadpool(_render_nodes_body)
+        await run_in_threadpool(_build_search_index)
+    # Índice de arestas construído aqui, não no primeiro /route/details:
+    # a montagem é O(E) e não pertence a um handler async.
+    if edges_df is not None:
+        await run_in_threadpool(route_utils._edge_lookup, edges_df)
+    engine_ready.set()
+    yield
+
+
+async def validation_exception_handler(request: Request, exc: ValidationError):
+    return ORJSONResponse(
+        status_code=422,
+        content={"error": "ValidationError", "message": str(exc)},
+    )
+
+
+async def general_exception_handler(request: Request, exc: Exception):
+    # exc_info deixa o formatter montar o traceback só se o nível estiver
+    # habilitado — nada de format_exc() incondicional numa tempestade de 5xx.
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error("Exception não tratada: %s", exc, exc_info=True)
+    return ORJSONResponse(
+        status_code=500,
+        content={"error": "InternalServerError", "message": str(exc)},
+    )
+
+
+# Tabela de despacho explícita, registrada no construtor: uma passada de
+# registro no startup e nenhum decorator a manter espalhado pelo módulo.
+_EXC_HANDLERS = {
+    ConneccityException: handle_conneccity_exception,
+    ValidationError: validation_exception_handler,
+    Exception: general_exception_handler,
+}
+
+app = FastAPI(
+    title="Conneccity API",
+    description="Rotas acessíveis para a cidade",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    exception_handlers=_EXC_HANDLERS,
+    lifespan=_lifespan,
+    **_docs_kwargs,
+)
+
+# Origens de dev permitidas, como regex compilada uma única vez pelo
+# Starlette; o preflight inteiro é resolvido dentro do CORSMiddleware.
+ALLOWED_ORIGIN_REGEX = r"^http://(localhost|127\.0\.0\.1):(3000|5173|5174|8000)$"
+
+# Comprime respostas grandes (/nodes, /edges são JSON com formato de CSV,
+# que comprime 5-10x); abaixo de 1 KiB não vale o custo de CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.include_router(graph_router)
+
+# Teto de Content-Length para o parse de body no middleware de log.
+_MAX_LOGGED_BODY = 4096
+
+
+# Id de request: contador monotônico prefixado pelo pid — único por
+# processo/worker, sem syscall de entropia nem formatação de UUID por hit.
+_PID_HEX = format(os.getpid(), "x")
+_req_counter = itertools.count()
+
+
+@app.middleware("http")
+async def log_middleware(request: Request, call_next):
+    rid = f"{_PID_HEX}-{next(_req_counter):x}"
+    t0 = time.monotonic_ns()
+    request_data: Dict[str, Any] = {}
+    if request.method == "POST" and request.url.path in ("/route", "/alternatives"):
+        # Só bufferiza bodies que realmente interessam ao log: JSON pequeno.
+        # Sem o teto, um body de 10 MB seria lido inteiro só para extrair
+        # from/to/perfil.
+        clen = int(request.headers.get("content-length", "0") or 0)
+        ctype = request.headers.get("content-type", "")
+    else:
+        clen, ctype = 0, ""
+    if ctype.startswith("application/json") and 0 < clen < _MAX_LOGGED_BODY:
+        try:
+            # Starlette cacheia o body, então o handler não paga uma segunda
+            # leitura; o parse aqui usa orjson (C) e o resultado fica em
+            # request.state para quem quiser reaproveitar.
+            body = await request.body()
+            if body:
+                request_data = orjson.loads(body)
+                request.state.parsed_body = request_data
+        except Exception:
+            request_data = {}
+    response = await call_next(request)
+    log_entry = {
+        "request_id": rid,
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": (time.monotonic_ns() - t0) // 1_000_000,
+    }
+    if request_data:
+        log_entry.update(
+            {
+                "from": request_data.get("from_id"),
+                "to": request_data.get("to_id"),
+                "perfil": request_data.get("perfil"),
+            }
+        )
+    # Linha estruturada direto no stdout: orjson serializa em C e evita o
+    # formatter do logging no caminho quente.
+    sys.stdout.buffer.write(orjson.dumps(log_entry, option=orjson.OPT_APPEND_NEWLINE))
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Modelos
+# ---------------------------------------------------------------------------
+
+
+class RouteRequest(BaseModel):
+    from_id: str
+    to_id: str
+    perfil: str = "padrao"
+    chuva: bool = False
+
+
+class AlternativesRequest(RouteRequest):
+    k: int = 3
+
+
+class RouteDetailsRequest(RouteRequest):
+    path: Optional[List[str]] = None
+
+
+class Alt(BaseModel):
+    id: int
+    tempo_total_min: float
+    transferencias: int
+    path: List[str]
+    barreiras_evitadas: List[str] = []
+
+
+class BarrierReport(BaseModel):
+    type: str
+    node_id: Optional[str] = None
+    description: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    severity: str = "media"
+
+
+class Notification(BaseModel):
+    id: str
+    type: str
+    title: str
+    message: str
+    priority: int = 0
+    created_at: datetime
+
+
+# ---------------------------------------------------------------------------
+# Rotas
+# ---------------------------------------------------------------------------
+
+
+# Payload de "/" é 100% estático: serializado uma vez no import, o handler
+# só devolve os bytes prontos.
+_ROOT_BODY = orjson.dumps(
+    {
+        "name": "Conneccity API",
+        "version": "1.0.0",
+        "description": "Rotas acessíveis para a cidade",
+        "endpoints": [
+            "/route",
+            "/alternatives",
+            "/route/details",
+            "/nodes",
+            "/edges",
+            "/nodes/search",
+            "/profiles",
+            "/notifications",
+            "/barriers/report",
+        ],
+    }
+)
+
+
+@app.get("/")
+async def root():
+    return Response(content=_ROOT_BODY, media_type="application/json")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "timestamp": time.time()}
+
+
+# Perfis são fixos por deploy: o corpo sai serializado uma vez no import,
+# como _ROOT_BODY.
+_PROFILES_BODY = orjson.dumps(
+    {
+        "profiles": [
+            {"id": perfil, "weights": weights}
+            for perfil, weights in DEFAULT_WEIGHTS.items()
+        ]
+    }
+)
+
+
+@app.get("/profiles")
+async def get_profiles():
+    # Os perfis só mudam com deploy; uma hora de cache no cliente zera as
+    # repetições do frontend.
+    return Response(
+        content=_PROFILES_BODY,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_params(perfil: str, chuva: bool):
+    """Struct Params por (perfil, chuva) — o domínio inteiro cabe no cache.
+
+    A struct retornada é tratada como imutável: o lado C só lê, e nenhum
+    caller escreve nos campos.
+    """
+    return engine._params(perfil, chuva)
+
+
+@functools.lru_cache(maxsize=65536)
+def _idx(node_id: str) -> int:
+    """Índice de um nó com memoização no processo.
+
+    engine.idx já é um lookup de dict, mas o lru_cache corta o getattr +
+    chamada de método por resolução e mantém o resultado estável entre o
+    handler e _calculate_route. Os ids são fixos após a carga; invalidado
+    em clear_all_caches().
+    """
+    return engine.idx(node_id)
+
+
+def _require_engine() -> None:
+    """Levanta 503 enquanto o engine ainda está aquecendo no startup."""
+    if not engine_ready.is_set():
+        raise EngineInitializationException("Motor de rotas ainda inicializando")
+
+
+def _resolve_nodes(request: RouteRequest) -> tuple:
+    """Índices (s, t) dos nós do pedido; -1 para os não encontrados."""
+    return _idx(request.from_id), _idx(request.to_id)
+
+
+def _ids_for(path_idx: List[int]) -> List[str]:
+    """Ids textuais de um caminho de índices do engine.
+
+    Um único fancy-index sobre o array object — as strings saem prontas,
+    por referência, sem decode nem indexação elemento a elemento.
+    """
+    return _NODE_ID_ARRAY[np.asarray(path_idx, dtype=np.intp)].tolist()
+
+
+def _calculate_route(s: int, t: int, perfil: str, chuva: bool) -> Optional[Dict[str, Any]]:
+    # Memoizado no route_cache e compartilhado com /route/details: um
+    # details logo após o /route correspondente não repete o Dijkstra.
+    key = (s, t, perfil, chuva, _graph_version)
+    cached = route_cache.get(key)
+    if cached is not None:
+        return cached
+    params = _cached_params(perfil, chuva)
+    path, cost = engine.best(s, t, params)
+    if not path:
+        return None
+    result = {
+        "path": _ids_for(path),
+        "tempo_total_min": round(cost, 1),
+        "perfil": perfil,
+        "chuva": chuva,
+    }
+    route_cache.set(key, result)
+    return result
+
+
+@app.post("/route")
+async def route(request: RouteRequest):
+    _require_engine()
+    if request.perfil not in PROFILES:
+        raise InvalidProfileException(
+            f"Perfil inválido: {request.perfil}",
+            details={"perfil": request.perfil, "validos": sorted(PROFILES)},
+        )
+    error = route_utils.validate_route_request(
+        request.from_id, request.to_id, request.perfil, PROFILES,
+        profile_prevalidated=True,
+    )
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    s, t = _resolve_nodes(request)
+    if s < 0 or t < 0:
+        raise NodeNotFoundException(
+            "Nó não encontrado",
+            details={"from_id": request.from_id, "to_id": request.to_id},
+        )
+    result = await run_in_threadpool(
+        _calculate_route, s, t, request.perfil, request.chuva
+    )
+    if result is None:
+        raise RouteCalculationException(
+            "Não há rota entre os nós informados",
+            details={"from_id": request.from_id, "to_id": request.to_id},
+        )
+    return result
+
+
+def _probe_reachability(s: int, params) -> int:
+    """Quantos dos 20 primeiros nós do grafo a origem alcança (diagnóstico)."""
+    reachable = 0
+    for test_idx in range(min(20, len(NODES_IDS))):
+        if test_idx == s:
+            continue
+        test_path, _ = engine.best(s, test_idx, params)
+        if test_path:
+            reachable += 1
+    return reachable
+
+
+@app.post("/alternatives")
+async def alternatives(request: AlternativesRequest):
+    _require_engine()
+    if request.perfil not in PROFILES:
+        raise InvalidProfileException(
+            f"Perfil inválido: {request.perfil}",
+            details={"perfil": request.perfil, "validos": sorted(PROFILES)},
+        )
+
+    # Yen é a operação mais cara do serviço e o resultado é função pura dos
+    # inputs entre recargas do grafo — a versão na chave invalida no reload.
+    cache_key = (
+        request.from_id,
+        request.to_id,
+        request.perfil,
+        request.chuva,
+        request.k,
+        _graph_version,
+    )
+    cached = alternatives_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    s, t = _resolve_nodes(request)
+
+    # Fallback: aceita nome do nó no lugar do id (probe no índice de nomes).
+    if s < 0 or t < 0:
+        if nodes_df is None or edges_df is None:
+            # Parse de CSV é bloqueante — vai para o threadpool como as FFI.
+            await run_in_threadpool(_ensure_dataframes)
+        if s < 0:
+            node_id = NAME_TO_ID.get(request.from_id.strip().lower())
+            if node_id is not None:
+                s = _idx(node_id)
+        if t < 0:
+            node_id = NAME_TO_ID.get(request.to_id.strip().lower())
+            if node_id is not None:
+                t = _idx(node_id)
+
+    if s < 0 or t < 0:
+        raise NodeNotFoundException(
+            "Nó não encontrado",
+            details={"from_id": request.from_id, "to_id": request.to_id},
+        )
+
+    # Diagnóstico só em DEBUG: os node_id() e a montagem das strings somem
+    # do caminho quente quando o nível é INFO+.
+    if logger.isEnabledFor(logging.DEBUG):
+        s_id, t_id = _ids_for((s, t))
+        logger.debug(
+            "[ALTERNATIVES] origem resolvida: %s (idx=%d); destino: %s (idx=%d)",
+            s_id,
+            s,
+            t_id,
+            t,
+        )
+
+    params = _cached_params(request.perfil, request.chuva)
+    routes = await run_in_threadpool(engine.k_alternatives, s, t, params, request.k)
+
+    if not routes:
+        if DEBUG_CONNECTIVITY:
+            # Diagnóstico: a origem alcança algum dos primeiros nós do grafo?
+            # São até 20 Dijkstras — longe do event loop, como as demais FFI.
+            reachable = await run_in_threadpool(_probe_reachability, s, params)
+            logger.warning(
+                "[ALTERNATIVES] sem alternativas %s->%s; origem alcança %d/20 nós de teste",
+                request.from_id,
+                request.to_id,
+                reachable,
+            )
+        else:
+            logger.warning(
+                "[ALTERNATIVES] sem alternativas %s->%s",
+                request.from_id,
+                request.to_id,
+            )
+        raise RouteCalculationException(
+            "Não há alternativas entre os nós informados",
+            details={"from_id": request.from_id, "to_id": request.to_id},
+        )
+
+    # Custos arredondados de uma vez (SoA): um np.round em vez de k round()
+    # escalares; os caminhos saem do gather vetorizado de _ids_for.
+    rounded = np.round([custo for _, custo in routes], 1).tolist()
+    alts: List[Alt] = []
+    for i, (path_idx, _) in enumerate(routes):
+        path_ids = _ids_for(path_idx)
+        if edges_df is not None:
+            # Passada única por alternativa: transferências e barreiras
+            # saem do mesmo loop sobre o índice de arestas.
+            summary = route_utils.summarize_path(path_ids, edges_df, request.perfil)
+            transfers = summary["transfers"]
+            barriers = summary["barriers"]
+        else:
+            transfers = 0
+            barriers = []
+        # model_construct pula a validação: todos os campos vêm do engine e
+        # do pós-processamento, já nos tipos certos (mesmo padrão das
+        # Notifications).
+        alts.append(
+            Alt.model_construct(
+                id=i,
+                tempo_total_min=rounded[i],
+                transferencias=transfers,
+                path=path_ids,
+                barreiras_evitadas=barriers,
+            )
+        )
+    result = {"alternatives": alts, "total": len(alts)}
+    alternatives_cache.set(cache_key, result)
+    return result
+
+
+@app.post("/route/details")
+async def get_route_details(request: RouteDetailsRequest):
+    _require_engine()
+    if request.path:
+        path_ids = request.path
+        if edges_df is None:
+            raise HTTPException(status_code=503, detail="Dados de arestas indisponíveis")
+        cost = None
+    else:
+        s, t = _resolve_nodes(request)
+        if s < 0 or t < 0:
+            raise NodeNotFoundException(
+                "Nó não encontrado",
+                details={"from_id": request.from_id, "to_id": request.to_id},
+            )
+        # Mesmo cálculo memoizado de /route: um details na sequência de um
+        # /route idêntico (ou variante repetida de chuva/perfil) vira hit.
+        result = await run_in_threadpool(
+            _calculate_route, s, t, request.perfil, request.chuva
+        )
+        if result is None:
+            raise RouteCalculationException("Não há rota entre os nós informados")
+        path_ids = result["path"]
+        cost = result["tempo_total_min"]
+
+    # Uma passada só: segmentos, transferências, barreiras e modos saem do
+    # mesmo loop; no ramo com path explícito o custo também (soma dos tempos).
+    summary = route_utils.summarize_path(path_ids, edges_df, request.perfil)
+    if cost is None:
+        cost = summary["total_time"]
+    return {
+        "path": path_ids,
+        "tempo_total_min": round(cost, 1),
+        "transferencias": summary["transfers"],
+        "barreiras_evitadas": summary["barriers"],
+        "modos": summary["modes"],
+        "segments": summary["segments"],
+    }
+
+
+# Corpo serializado de /nodes, válido por versão do grafo: o dataset é
+# imutável entre recargas, então a resposta vira um blob de bytes pronto.
+_nodes_body: Dict[str, Any] = {"version": -1, "body": b"", "etag": ""}
+
+
+def _render_nodes_body() -> Dict[str, Any]:
+    """(Re)serializa o envelope de /nodes para a versão atual do grafo."""
+    df = nodes_df[["id", "name", "lat", "lon", "tipo"]].copy()
+    df[["id", "name", "tipo"]] = (
+        df[["id", "name", "tipo"]].astype(object).fillna("").astype(str)
+    )
+    df[["lat", "lon"]] = df[["lat", "lon"]].fillna(0.0).astype(float)
+    nodes_list = df.to_dict(orient="records")
+    body = orjson.dumps({"nodes": nodes_list, "total": len(nodes_list)})
+    _nodes_body.update(
+        version=_graph_version,
+        body=body,
+        etag='"%x-%x"' % (_graph_version, len(body)),
+    )
+    return _nodes_body
+
+
+def _stream_nodes():
+    """Gera o dataset de nós como NDJSON em lotes de 1000 linhas.
+
+    Pico de memória O(lote) em vez do blob inteiro — para grafos grandes e
+    consumidores programáticos (mesmo contrato do /edges).
+    """
+    df = nodes_df[["id", "name", "lat", "lon", "tipo"]].copy()
+    df[["id", "name", "tipo"]] = (
+        df[["id", "name", "tipo"]].astype(object).fillna("").astype(str)
+    )
+    df[["lat", "lon"]] = df[["lat", "lon"]].fillna(0.0).astype(float)
+    for start in range(0, len(df), 1000):
+        chunk = df.iloc[start : start + 1000].to_dict(orient="records")
+        yield b"".join(orjson.dumps(record) + b"\n" for record in chunk)
+
+
+@app.get("/nodes")
+async def get_nodes(request: Request, stream: bool = False):
+    """Lista completa de nós no envelope {"nodes": [...], "total": N}.
+
+    As coerções rodam por coluna (C/numpy) e o resultado fica cacheado já
+    serializado; com ETag/Cache-Control o navegador nem repete o download.
+    Com ?stream=true a resposta sai como NDJSON incremental, sem
+    materializar o corpo inteiro.
+    """
+    if nodes_df is None:
+        raise HTTPException(status_code=503, detail="Dados de nós indisponíveis")
+    if stream:
+        return StreamingResponse(_stream_nodes(), media_type="application/x-ndjson")
+    cached = _nodes_body
+    if cached["version"] != _graph_version:
+        cached = await run_in_threadpool(_render_nodes_body)
+    headers = {"ETag": cached["etag"], "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == cached["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=cached["body"], media_type="application/json", headers=headers
+    )
+
+
+@app.get("/edges")
+async def get_edges():
+    """Dataset de arestas como NDJSON, linha a linha."""
+
+    def gen():
+        with open(GRAPH_SOURCE_EDGES, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            idx = {column: i for i, column in enumerate(header)}
+            i_from, i_to, i_tempo = idx["from"], idx["to"], idx["tempo_min"]
+            i_trans, i_escada = idx["transferencia"], idx["escada"]
+            i_calcada, i_risco, i_modo = (
+                idx["calcada_ruim"],
+                idx["risco_alag"],
+                idx["modo"],
+            )
+            for row in reader:
+                yield orjson.dumps(
+                    {
+                        "from": row[i_from],
+                        "to": row[i_to],
+                        "tempo_min": float(row[i_tempo]),
+                        "transferencia": int(row[i_trans]),
+                        "escada": int(row[i_escada]),
+                        "calcada_ruim": int(row[i_calcada]),
+                        "risco_alag": int(row[i_risco]),
+                        "modo": row[i_modo],
+                    }
+                ) + b"\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+# Índice de busca de /nodes/search: colunas minúsculas materializadas uma
+# vez por versão do grafo + ordem lexicográfica dos nomes para resolver o
+# caso comum de autocomplete (prefixo) em O(log N + hits).
+_search_index: Dict[str, Any] = {"version": -1}
+
+
+def _join_blob(values: List[str]) -> tuple:
+    """Concatena os valores num blob único + offsets de início por linha.
+
+    Substring não contém '\\n', então um match nunca atravessa o separador;
+    o offset do hit volta para a linha via searchsorted nos inícios.
+    """
+    lens = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    starts = np.zeros(len(values), dtype=np.int64)
+    if len(values) > 1:
+        np.cumsum(lens[:-1] + 1, out=starts[1:])
+    return "\n".join(values), starts
+
+
+def _build_search_index() -> Dict[str, Any]:
+    names_list = nodes_df["name"].fillna("").astype(str).str.lower().tolist()
+    ids_list = nodes_df["id"].fillna("").astype(str).str.lower().tolist()
+    names = np.asarray(names_list, dtype=str)
+    order = np.argsort(names, kind="stable")
+    name_blob, name_starts = _join_blob(names_list)
+    id_blob, id_starts = _join_blob(ids_list)
+    _search_index.update(
+        version=_graph_version,
+        order=order,
+        sorted_names=names[order],
+        name_blob=name_blob,
+        name_starts=name_starts,
+        id_blob=id_blob,
+        id_starts=id_starts,
+    )
+    return _search_index
+
+
+def _blob_rows(blob: str, starts: np.ndarray, query: str, limit: int) -> set:
+    """Linhas com substring no blob, via str.find (memmem em C) sucessivos.
+
+    Varre o blob inteiro numa string só em vez de um find por linha —
+    mesma resposta de np.char.find >= 0, uma fração do overhead.
+    """
+    rows: set = set()
+    pos = blob.find(query)
+    while pos != -1 and len(rows) < limit:
+        rows.add(int(np.searchsorted(starts, pos, side="right")) - 1)
+        pos = blob.find(query, pos + 1)
+    return rows
+
+
+@app.get("/nodes/search")
+async def search_nodes(q: str, response: Response):
+    if nodes_df is None:
+        raise HTTPException(status_code=503, detail="Dados de nós indisponíveis")
+    # Autocomplete repete a mesma query a cada tecla apagada/redigitada;
+    # 60s de cache no cliente eliminam boa parte dessas repetições.
+    response.headers["Cache-Control"] = "public, max-age=60"
+    index = _search_index
+    if index["version"] != _graph_version:
+        index = _build_search_index()
+    query_lower = q.lower()
+    # Prefixo no nome via bisect na ordem lexicográfica; todo hit de
+    # prefixo também é hit de substring, então o caminho rápido só vale
+    # se já enche o limite.
+    lo = np.searchsorted(index["sorted_names"], query_lower, side="left")
+    hi = np.searchsorted(index["sorted_names"], query_lower + "\uffff", side="left")
+    positions = index["order"][lo:hi][:20]
+    if len(positions) < 20 and "\n" not in query_lower:
+        # Substring em nome ou id: um único find sobre o blob concatenado
+        # (memmem em C na string inteira) em vez de um find por linha.
+        rows = _blob_rows(index["name_blob"], index["name_starts"], query_lower, 20)
+        rows |= _blob_rows(index["id_blob"], index["id_starts"], query_lower, 20)
+        positions = sorted(rows)[:20]
+    # Montagem por coluna: fillna + astype rodam em C sobre <=20 linhas e
+    # to_dict('records') fecha a lista — sem Series nem pd.notna por célula.
+    out = nodes_df.iloc[positions][["id", "name", "lat", "lon", "tipo"]].copy()
+    out["id"] = out["id"].astype(str)
+    out["name"] = out["name"].astype(object).fillna("").astype(str)
+    out["tipo"] = out["tipo"].astype(object).fillna("unknown").astype(str)
+    out[["lat", "lon"]] = out[["lat", "lon"]].fillna(0.0).astype(float)
+    results = out.to_dict(orient="records")
+    return {"results": results, "total": len(results)}
+
+
+@app.get("/metrics/edge-to-fix")
+async def get_edge_to_fix(perfil: str = "cadeirante", chuva: bool = False, top: int = 10):
+    _require_engine()
+    if perfil not in PROFILES:
+        raise InvalidProfileException(
+            f"Perfil inválido: {perfil}",
+            details={"perfil": perfil, "validos": sorted(PROFILES)},
+        )
+    params = _cached_params(perfil, chuva)
+    # Varre as arestas no C — bloqueante como Dijkstra/Yen, mesmo destino.
+    improvements = await run_in_threadpool(
+        engine.analyze_edge_improvements, params, top
+    )
+    ids = NODES_IDS
+    results = []
+    for imp in improvements:
+        # Os índices vêm do próprio engine e são válidos por construção;
+        # um IndexError aqui indicaria bug no C, não um caso a tolerar.
+        from_id = ids[imp["from"]]
+        to_id = ids[imp["to"]]
+        results.append(
+            {
+                "edge": "".join((from_id, "->", to_id)),
+                "from_id": from_id,
+                "to_id": to_id,
+                "issue_type": imp["issue_type"],
+                "current_cost": imp["current_cost"],
+                "potential_savings": imp["potential_savings"],
+                "affected_routes": imp["affected_routes"],
+                "impact_score": imp["impact_score"],
+                "priority": imp["priority"],
+            }
+        )
+    return {"improvements": results, "perfil": perfil, "chuva": chuva}
+
+
+@app.get("/metrics/performance")
+async def get_performance_metrics():
+    return {
+        "route_cache": route_cache.stats(),
+        "alternatives_cache": alternatives_cache.stats(),
+        "timestamp": time.time(),
+    }
+
+
+@app.post("/admin/clear-caches")
+async def admin_clear_caches():
+    clear_all_caches()
+    return {"status": "ok"}
+
+
+# ---------------------------------------------------------------------------
+# Barreiras e notificações
+# ---------------------------------------------------------------------------
+
+
+@app.post("/barriers/report")
+async def report_barrier(report: BarrierReport):
+    payload = {
+        "id": str(uuid.uuid4()),
+        "type": report.type,
+        "node_id": report.node_id,
+        "description": report.description,
+        "lat": report.lat,
+        "lon": report.lon,
+        "severity": report.severity,
+        "reported_at": datetime.now(),
+        "received_at": time.time(),
+    }
+    # orjson serializa datetime nativamente (sem callback Python por campo)
+    # e emite UTF-8 direto; OPT_APPEND_NEWLINE entrega a linha pronta.
+    data = orjson.dumps(
+        payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE
+    )
+    entry = {**payload, "reported_at": payload["reported_at"].isoformat()}
+    # Append síncrono sai do event loop: a escrita (e eventual flush em
+    # disco contendido) roda no threadpool, sem travar as outras corrotinas.
+    await run_in_threadpool(_append_barrier, data, entry)
+    logger.info("[BARRIERS] novo relato: %s (%s)", report.type, report.severity)
+    return {"status": "ok", "id": payload["id"]}
+
+
+# Textos estáticos de /notifications; montados uma única vez no import.
+TIPS = {
+    "chuva": "Em dias de chuva, prefira rotas sem risco de alagamento.",
+    "acessibilidade": "Rotas para cadeirantes evitam escadas automaticamente.",
+    "horario": "Evite horários de pico para viagens mais confortáveis.",
+}
+TYPE_NAMES = {
+    "escada": "Escada",
+    "calcada_ruim": "Calçada ruim",
+    "alagamento": "Alagamento",
+    "elevador_quebrado": "Elevador quebrado",
+    "outro": "Outro",
+}
+
+
+def _append_barrier(data: bytes, entry: Dict[str, Any]) -> None:
+    """Anexa uma linha ao arquivo do dia e alimenta o índice em memória.
+
+    Roda no threadpool; o lock serializa escritores concorrentes (sem linha
+    rasgada). O índice só avança quando o leitor estava em dia com o
+    arquivo (offset == tamanho pré-write): se há bytes entre o offset e
+    esta linha — conteúdo pré-restart ou appends de outros workers no
+    mesmo arquivo-dia — o estado fica intocado e o próximo
+    _recent_barriers lê do offset antigo, ingerindo os bytes alheios e
+    esta linha juntos. O mtime nunca é tocado na escrita — é o leitor que
+    o avança.
+    """
+    path = _barrier_path_for(entry["received_at"])
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with _barriers_lock:
+        with open(path, "ab") as f:
+            pre_write = f.tell()
+            f.write(data)
+            state = _barriers_cache["files"].get(path)
+            if state is not None and state[1] == pre_write:
+                # Nada por ler antes desta linha: avança o offset e entrega
+                # a entrada direto ao deque, sem re-parse pelo leitor.
+                state[1] = f.tell()
+                _barriers_cache["entries"].append(entry)
+
+
+def _recent_barriers() -> List[Dict[str, Any]]:
+    """Relatos dos últimos 7 dias, via o índice incremental por arquivo-dia.
+
+    Para cada arquivo da janela: mtime inalterado não lê nada; crescimento
+    parseia só os bytes novos (binário + orjson, com um teste de bytes
+    barato antes do parse). Estado de dias fora da janela é descartado.
+    """
+    now = time.time()
+    cutoff = now - 7 * 24 * 3600
+    week = _barrier_week_paths(now)
+    with _barriers_lock:
+        entries = _barriers_cache["entries"]
+        files = _barriers_cache["files"]
+        for stale in [p for p in files if p not in week]:
+            del files[stale]
+        for path in week:
+            try:
+                st = os.stat(path)
+            except OSError:
+                files.pop(path, None)
+                continue
+            state = files.setdefault(path, [0, 0])
+            if st.st_size < state[1]:
+                # Truncado/reescrito: recomeça do zero (arquivos são
+                # append-only por contrato; isso só acontece em intervenção
+                # manual).
+                state[:] = [0, 0]
+            if st.st_mtime_ns != state[0]:
+                with open(path, "rb") as f:
+                    f.seek(state[1])
+                    for line in f:
+                        if b'"received_at"' not in line:
+                            continue
+                        try:
+                            entry = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            continue
+                        if entry.get("received_at", 0) > cutoff:
+                            entries.append(entry)
+                    state[1] = f.tell()
+                state[0] = st.st_mtime_ns
+        while entries and entries[0].get("received_at", 0) < cutoff:
+            entries.popleft()
+        return list(entries)
+
+
+@app.get("/notifications")
+async def get_notifications():
+    notifications: List[Notification] = []
+    now = datetime.now()
+
+    # O stat + eventual leitura incremental do JSONL rodam no threadpool;
+    # o resto do handler é só montagem de objetos no event loop.
+    recent_barriers = await run_in_threadpool(_recent_barriers)
+
+    barrier_types = Counter(b.get("type", "outro") for b in recent_barriers)
+
+    for btype, count in barrier_types.items():
+        notifications.append(
+            # model_construct pula a validação do Pydantic: os campos vêm
+            # todos de literais locais já com o tipo certo.
+            Notification.model_construct(
+                id=f"barrier-{btype}",
+                type="barrier",
+                title=f"{TYPE_NAMES.get(btype, btype)}: {count} relato(s)",
+                message=f"{count} relato(s) de {TYPE_NAMES.get(btype, btype)} nos últimos 7 dias",
+                priority=2 if count >= 3 else 1,
+                created_at=now,
+            )
+        )
+
+    notifications.append(
+        Notification.model_construct(
+            id="tip-daily",
+            type="tip",
+            title="Dica do dia",
+            message=TIPS["acessibilidade"],
+            priority=0,
+            created_at=now,
+        )
+    )
+    notifications.append(
+        Notification.model_construct(
+            id="system-status",
+            type="system",
+            title="Sistema operacional",
+            message="Todos os serviços funcionando normalmente.",
+            priority=0,
+            created_at=now,
+        )
+    )
+
+    notifications.sort(key=lambda n: (-n.priority, -n.created_at.timestamp()))
+    return {"notifications": notifications[:10], "total": len(notifications)}
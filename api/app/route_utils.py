@@ -0,0 +1,255 @@
+"""Utilitários de carga de dados e pós-processamento de rotas."""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow.csv as pacsv
+
+    _HAS_PYARROW = True
+except ImportError:  # pyarrow é opcional; sem ele a carga cai no pandas
+    _HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    """Lê um CSV como DataFrame, via pyarrow quando disponível.
+
+    O leitor C++ do Arrow parseia em múltiplas threads e materializa
+    buffers colunares contíguos — a carga dos datasets integrados domina o
+    boot e cai de vez aqui. Sem schema fixo: os datasets das várias
+    camadas não compartilham colunas, e a inferência do Arrow é uma
+    passada em C.
+    """
+    if _HAS_PYARROW:
+        table = pacsv.read_csv(
+            path, read_options=pacsv.ReadOptions(block_size=1 << 20)
+        )
+        return table.to_pandas()
+    return pd.read_csv(path)
+
+
+# Dtypes compactos por coluna: strings contíguas (Arrow quando disponível)
+# no lugar de object, category para os poucos valores distintos de
+# tipo/modo e float32 para coordenadas (precisão de exibição). Menos
+# memória e kernels de string em C nas operações por coluna.
+_STRING_DTYPE = "string[pyarrow]" if _HAS_PYARROW else "string"
+_NODES_DTYPES = {
+    "id": _STRING_DTYPE,
+    "name": _STRING_DTYPE,
+    "tipo": "category",
+    "lat": "float32",
+    "lon": "float32",
+}
+_EDGES_DTYPES = {
+    "from": _STRING_DTYPE,
+    "to": _STRING_DTYPE,
+    "modo": "category",
+    "tempo_min": "float32",
+    "transferencia": "int8",
+    "escada": "int8",
+    "calcada_ruim": "int8",
+    "risco_alag": "int8",
+}
+
+
+def _shrink(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Aplica os dtypes compactos às colunas presentes no DataFrame.
+
+    As camadas de dados não compartilham schema, então o mapa é filtrado
+    pelas colunas que de fato existem. Coluna a coluna: uma flag com
+    valores fora do esperado (NaN num int8, por exemplo) fica como veio
+    em vez de derrubar a carga inteira.
+    """
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError) as exc:
+            logger.warning("Coluna %s mantida sem conversão para %s: %s", col, dtype, exc)
+    return df
+
+
+def load_graph_data(nodes_file: str, edges_file: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Carrega os CSVs de nós e arestas como DataFrames."""
+    nodes_df = _shrink(_read_csv(nodes_file), _NODES_DTYPES)
+    edges_df = _shrink(_read_csv(edges_file), _EDGES_DTYPES)
+    logger.info(
+        "Dados carregados: %d nós, %d arestas de %s",
+        len(nodes_df),
+        len(edges_df),
+        nodes_file,
+    )
+    return nodes_df, edges_df
+
+
+# Índice (from, to) -> atributos da aresta, construído uma vez por carga.
+# A comparação por identidade com o próprio DataFrame invalida o índice
+# quando o grafo é recarregado (o reload cria outro objeto).
+_edge_index: Dict[str, Any] = {"df": None, "lookup": {}}
+
+
+def _edge_lookup(edges_df: pd.DataFrame) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Dicionário (from, to) -> dict de atributos, memoizado por DataFrame.
+
+    Uma corrida entre threads no primeiro acesso só reconstrói o mesmo
+    índice duas vezes; o resultado é idêntico, então não há lock.
+    """
+    if _edge_index["df"] is not edges_df:
+        froms = edges_df["from"].astype(str).tolist()
+        tos = edges_df["to"].astype(str).tolist()
+        records = edges_df.to_dict(orient="records")
+        lookup = dict(zip(zip(froms, tos), records))
+        # Sentido inverso pré-semeado (sem sobrescrever arestas reais):
+        # a consulta vira um único probe em vez de dois.
+        for to_id, from_id, record in zip(tos, froms, records):
+            lookup.setdefault((to_id, from_id), record)
+        _edge_index["lookup"] = lookup
+        _edge_index["df"] = edges_df
+    return _edge_index["lookup"]
+
+
+def get_edge_info(
+    from_id: str, to_id: str, edges_df: pd.DataFrame
+) -> Optional[Dict[str, Any]]:
+    """Atributos da aresta from_id→to_id (ou to_id→from_id), se existir.
+
+    O dict retornado é compartilhado com o índice — tratar como somente
+    leitura.
+    """
+    return _edge_lookup(edges_df).get((str(from_id), str(to_id)))
+
+
+def get_path_segments(path_ids: List[str], edges_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Lista de segmentos (aresta a aresta) de um caminho."""
+    segments = []
+    for i in range(len(path_ids) - 1):
+        info = get_edge_info(path_ids[i], path_ids[i + 1], edges_df)
+        if info is not None:
+            segments.append(
+                {
+                    "from": path_ids[i],
+                    "to": path_ids[i + 1],
+                    "tempo_min": float(info.get("tempo_min", 0.0)),
+                    "modo": str(info.get("modo", "unknown")),
+                    "transferencia": int(info.get("transferencia", 0)),
+                }
+            )
+    return segments
+
+
+def calculate_transfers(path_ids: List[str], edges_df: pd.DataFrame) -> int:
+    """Número de transferências ao longo do caminho."""
+    transfers = 0
+    for i in range(len(path_ids) - 1):
+        info = get_edge_info(path_ids[i], path_ids[i + 1], edges_df)
+        if info is not None and int(info.get("transferencia", 0)):
+            transfers += 1
+    return transfers
+
+
+# Barreiras relevantes por perfil: coluna da aresta -> rótulo humano.
+_PROFILE_BARRIERS = {
+    "cadeirante": {
+        "escada": "escada",
+        "calcada_ruim": "calçada ruim",
+        "risco_alag": "risco de alagamento",
+    },
+    "mobilidade_reduzida": {
+        "escada": "escada",
+        "calcada_ruim": "calçada ruim",
+    },
+    "padrao": {
+        "risco_alag": "risco de alagamento",
+    },
+}
+
+
+def identify_avoided_barriers(
+    path_ids: List[str], edges_df: pd.DataFrame, perfil: str
+) -> List[str]:
+    """Barreiras (relevantes ao perfil) presentes nas arestas do caminho."""
+    relevant = _PROFILE_BARRIERS.get(perfil, _PROFILE_BARRIERS["padrao"])
+    barriers = []
+    for i in range(len(path_ids) - 1):
+        info = get_edge_info(path_ids[i], path_ids[i + 1], edges_df)
+        if info is None:
+            continue
+        for column, label in relevant.items():
+            if int(info.get(column, 0)):
+                barriers.append(f"{label} em {path_ids[i]}->{path_ids[i + 1]}")
+    return barriers
+
+
+def summarize_path(
+    path_ids: List[str], edges_df: pd.DataFrame, perfil: str
+) -> Dict[str, Any]:
+    """Resumo completo de um caminho em uma única passada sobre as arestas.
+
+    Funde get_path_segments + calculate_transfers + identify_avoided_barriers:
+    cada par consecutivo é resolvido uma vez no índice, em vez de três
+    varreduras independentes sobre os mesmos pares.
+    """
+    lookup = _edge_lookup(edges_df)
+    relevant = _PROFILE_BARRIERS.get(perfil, _PROFILE_BARRIERS["padrao"])
+    segments: List[Dict[str, Any]] = []
+    barriers: List[str] = []
+    modes = set()
+    transfers = 0
+    total_time = 0.0
+    for u, v in zip(path_ids, path_ids[1:]):
+        u, v = str(u), str(v)
+        info = lookup.get((u, v))
+        if info is None:
+            continue
+        tempo = float(info.get("tempo_min", 0.0))
+        modo = str(info.get("modo", "unknown"))
+        transfer = int(info.get("transferencia", 0))
+        segments.append(
+            {
+                "from": u,
+                "to": v,
+                "tempo_min": tempo,
+                "modo": modo,
+                "transferencia": transfer,
+            }
+        )
+        total_time += tempo
+        modes.add(modo)
+        if transfer:
+            transfers += 1
+        for column, label in relevant.items():
+            if int(info.get(column, 0)):
+                barriers.append(f"{label} em {u}->{v}")
+    return {
+        "segments": segments,
+        "transfers": transfers,
+        "barriers": barriers,
+        "modes": sorted(modes),
+        "total_time": total_time,
+    }
+
+
+def validate_route_request(
+    from_id: str,
+    to_id: str,
+    perfil: str,
+    valid_profiles: Any,
+    profile_prevalidated: bool = False,
+) -> Optional[str]:
+    """Valida um pedido de rota; retorna mensagem de erro ou None.
+
+    ``profile_prevalidated`` pula o re-teste de perfil quando o handler já
+    o validou no caminho rápido.
+    """
+    if not from_id or not to_id:
+        return "Origem e destino são obrigatórios"
+    if from_id == to_id:
+        return "Origem e destino devem ser diferentes"
+    if not profile_prevalidated and perfil not in valid_profiles:
+        return f"Perfil inválido: {perfil}"
+    return None